@@ -0,0 +1,16 @@
+"""
+Colores de consola compartidos por los scripts de src/.
+"""
+import sys
+
+# Colores solo en terminal: con la salida redirigida se omite colorama
+# (su filtro analiza cada escritura en busca de secuencias ANSI)
+if sys.stdout.isatty():
+    from colorama import init, Fore, Back, Style
+    init(autoreset=True)  # autoreset=True hace que cada impresión vuelva al color normal
+else:
+    class _NoColor:
+        """Sustituto de Fore/Back/Style que devuelve cadenas vacías."""
+        def __getattr__(self, name):
+            return ''
+    Fore = Back = Style = _NoColor()
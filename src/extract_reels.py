@@ -7,30 +7,51 @@ import json
 import time
 import subprocess
 import re
+import hashlib
 from datetime import datetime
-from dotenv import load_dotenv
-from colorama import init, Fore, Style
+from concurrent.futures import ThreadPoolExecutor
 
-# Verificar dependencias requeridas
+# orjson es opcional: acelera la carga de transcripciones grandes
 try:
-    import anthropic
+    import orjson
 except ImportError:
-    print("Error: Biblioteca anthropic no encontrada.")
-    print("Por favor, instálala ejecutando: pip install anthropic")
-    sys.exit(1)
+    orjson = None
 
-# Inicializar colorama
-init(autoreset=True)  # autoreset=True hace que cada impresión vuelva al color normal
+# Decodificador JSON del script (orjson.JSONDecodeError hereda de json.JSONDecodeError)
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# Colores de consola (sin colorama cuando la salida no es una terminal)
+from console_colors import Fore, Style
 
 # Constantes
 MIN_DURATION_SECONDS = 15  # Duración mínima recomendada (15 segundos)
 MAX_DURATION_SECONDS = 180  # Duración máxima (3 minutos)
+SENTENCE_END = ('.', '!', '?')  # Signos que cierran una oración
+MAX_PARALLEL_REELS = min(4, os.cpu_count() or 1)  # Segmentos procesados a la vez (un ffmpeg por segmento)
+
+# Modelos de Claude en orden de preferencia: si uno falla, se prueba el siguiente
+CLAUDE_MODELS = (
+    "claude-sonnet-4-5",  # Modelo principal: mejor calidad en el JSON de segmentos
+    "claude-haiku-4-5",  # Respaldo más rápido y barato si sonnet no responde
+)
+CLAUDE_MAX_TOKENS = 4000
+CLAUDE_PROGRESS_STEP = 500  # Caracteres recibidos entre actualizaciones del progreso
+CLAUDE_TEMPERATURE = 0  # Respuestas deterministas: el mismo sermón da los mismos segmentos
+CLAUDE_SYSTEM_PROMPT = "Por favor, analízate el sermón y extrae segmentos siguiendo las instrucciones. Asegúrate de responder SOLO en formato JSON válido dentro de marcadores ```json. Es crucial que el JSON esté bien formateado sin comentarios ni caracteres adicionales."
+
+# Rutas del proyecto (se calculan una sola vez al importar)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "data", "output")
+CLAUDE_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "claude")
+ENV_PATH = os.path.join(BASE_DIR, ".env")  # Claves de API (ruta fija: sin buscar el .env por directorios)
 
 def load_json_transcription(json_path):
     """Carga el archivo JSON de transcripción y verifica su estructura."""
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Leer el archivo de una vez y decodificar desde memoria
+        with open(json_path, 'rb') as f:
+            raw_content = f.read()
+        data = json_loads(raw_content)
         
         # Verificar estructura mínima necesaria
         if "words" not in data or not isinstance(data["words"], list) or not data["words"]:
@@ -46,24 +67,133 @@ def load_json_transcription(json_path):
 
 def setup_claude_client():
     """Configura el cliente de API de Claude usando la clave en .env."""
+    # Importación diferida: anthropic (con httpx, pydantic...) solo se carga
+    # cuando de verdad hay que llamar a la API, no para mostrar el menú
     try:
-        load_dotenv()
+        import anthropic
+    except ImportError:
+        print("Error: Biblioteca anthropic no encontrada.")
+        print("Por favor, instálala ejecutando: pip install anthropic")
+        sys.exit(1)
+    from dotenv import load_dotenv
+
+    try:
+        load_dotenv(ENV_PATH)
         api_key = os.getenv("ANTHROPIC_API_KEY")
         
         if not api_key:
             print(f"{Fore.RED}Error: No se encontró la clave API de Claude en el archivo .env")
             sys.exit(1)
             
-        client = anthropic.Anthropic(api_key=api_key)
+        # Tiempos límite por fase: una conexión colgada falla en segundos en lugar
+        # de bloquear el script (read se aplica entre fragmentos del streaming)
+        client = anthropic.Anthropic(
+            api_key=api_key,
+            timeout=anthropic.Timeout(connect=5.0, read=60.0, write=10.0, pool=5.0),
+            max_retries=2,
+        )
         return client
     except Exception as e:
         print(f"{Fore.RED}Error al configurar el cliente de Claude: {e}")
         sys.exit(1)
 
-def create_claude_prompt(transcription_text):
-    """Crea el prompt especializado para enviar a Claude."""
+def request_claude_analysis(claude_client, prompt):
+    """Envía el mensaje a Claude probando los modelos de CLAUDE_MODELS en orden.
+    
+    Devuelve el texto de la respuesta. Si todos los modelos fallan se relanza
+    el último error de la API.
+    """
+    import anthropic  # Ya cargado por setup_claude_client
+
+    # La línea de progreso con \r solo tiene sentido en una terminal
+    show_progress = sys.stdout.isatty()
+    last_error = None
+    for model in CLAUDE_MODELS:
+        progress_line_open = False
+        try:
+            # Recibir la respuesta en streaming para mostrar el avance mientras
+            # Claude genera, en lugar de esperar en silencio la respuesta completa
+            with claude_client.messages.stream(
+                model=model,
+                max_tokens=CLAUDE_MAX_TOKENS,
+                temperature=CLAUDE_TEMPERATURE,
+                system=CLAUDE_SYSTEM_PROMPT,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                received_chars = 0
+                shown_chars = 0
+                for text in stream.text_stream:
+                    received_chars += len(text)
+                    # Actualizar cada CLAUDE_PROGRESS_STEP caracteres, no en cada fragmento
+                    if show_progress and received_chars - shown_chars >= CLAUDE_PROGRESS_STEP:
+                        shown_chars = received_chars
+                        progress_line_open = True
+                        print(f"\r{Fore.CYAN}Recibiendo respuesta de Claude... {received_chars} caracteres", end='', flush=True)
+                if progress_line_open:
+                    print()
+                    progress_line_open = False
+                print(f"{Fore.CYAN}Respuesta de Claude recibida: {received_chars} caracteres")
+                return stream.get_final_text()
+        except anthropic.APIError as e:
+            if progress_line_open:
+                print()  # Cerrar la línea de progreso antes del mensaje de error
+            print(f"{Fore.YELLOW}Error con el modelo {model}: {e}")
+            last_error = e
+    raise last_error
+
+def claude_cache_path(prompt):
+    """Ruta del archivo de caché para un prompt.
     
-    prompt = f"""
+    La clave incluye todo lo que influye en la respuesta (modelos, mensaje de
+    sistema, prompt, max_tokens y temperatura), así que cualquier cambio invalida la caché.
+    """
+    key_data = json.dumps({
+        "models": CLAUDE_MODELS,
+        "system": CLAUDE_SYSTEM_PROMPT,
+        "prompt": prompt,
+        "max_tokens": CLAUDE_MAX_TOKENS,
+        "temperature": CLAUDE_TEMPERATURE,
+    }, sort_keys=True, ensure_ascii=False)
+    key = hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+    return os.path.join(CLAUDE_CACHE_DIR, f"{key}.txt")
+
+def load_cached_response(prompt):
+    """Devuelve la respuesta guardada para este prompt, o None si no existe."""
+    try:
+        with open(claude_cache_path(prompt), 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def save_cached_response(prompt, response_text):
+    """Guarda la respuesta de Claude en la caché (escritura atómica)."""
+    try:
+        os.makedirs(CLAUDE_CACHE_DIR, exist_ok=True)
+        cache_path = claude_cache_path(prompt)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(response_text)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"{Fore.YELLOW}No se pudo guardar la respuesta en caché: {e}")
+
+# Expresiones para reparar y rescatar el JSON de la respuesta de Claude
+# (compiladas una sola vez)
+JSON_FENCE_RE = re.compile(r'```json(.*?)```', re.DOTALL)
+COMMENT_LINE_RE = re.compile(r'^[^\S\n]*//[^\n]*\n?', re.MULTILINE)
+TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+UNQUOTED_KEY_RE = re.compile(r'([\w]+)\s*:')
+SEGMENT_OBJECT_RE = re.compile(r'\{[^\{\}]*"text"\s*:\s*"[^"]*"[^\{\}]*\}')
+TEXT_FIELD_RE = re.compile(r'"text"\s*:\s*"([^"]*)"')
+SCORE_FIELD_RE = re.compile(r'"score"\s*:\s*(\d+)')
+REASONS_FIELD_RE = re.compile(r'"reasons"\s*:\s*"([^"]*)"')
+MARKER_FIELD_RE = re.compile(r'"marker_phrase"\s*:\s*"([^"]*)"')
+
+# Instrucciones fijas del prompt de análisis: se construyen una sola vez al
+# importar el módulo; solo la transcripción cambia entre llamadas
+CLAUDE_PROMPT_INSTRUCTIONS = """
     Tu tarea es analizar un sermón transcrito e identificar IDEAS COMPLETAS Y AUTÓNOMAS que serían efectivas para crear reels religiosos. Estas ideas deben ser GRAMATICALMENTE COMPLETAS, con principio, desarrollo y cierre claro.
     
     REGLAS CRUCIALES PARA DELIMITAR LAS IDEAS CORRECTAMENTE:
@@ -102,40 +232,37 @@ def create_claude_prompt(transcription_text):
     
     ```json
     [
-      {{
+      {
         "text": "Texto COMPLETO del segmento con inicio y cierre gramatical perfecto. Verifica que la primera y última palabra formen parte de oraciones completas...",
         "score": 42,
         "reasons": "Razones por las que esta idea es teológicamente impactante y autónoma...",
         "marker_phrase": "frase única y distintiva dentro del segmento"
-      }},
+      },
       // Más segmentos...
     ]
     ```
     
     SERMÓN TRANSCRITO:
-    {transcription_text}
     """
-    
-    return prompt
+
+def create_claude_prompt(transcription_text):
+    """Crea el prompt especializado para enviar a Claude."""
+    return f"{CLAUDE_PROMPT_INSTRUCTIONS}{transcription_text}\n    "
 
 def extract_json_from_response(response_text):
     """Extrae el JSON de la respuesta de Claude con mejor manejo de errores."""
     try:
         # Primero buscamos el formato más común: JSON entre marcadores de código
-        start_marker = "```json"
-        end_marker = "```"
-        
-        if start_marker in response_text:
-            start_idx = response_text.find(start_marker) + len(start_marker)
-            end_idx = response_text.find(end_marker, start_idx)
-            if end_idx > start_idx:
-                json_text = response_text[start_idx:end_idx].strip()
-                # Intento de análisis con este método
-                try:
-                    segments = json.loads(json_text)
-                    return segments
-                except Exception as e:
-                    print(f"{Fore.YELLOW}Error en el primer método de extracción: {e}")
+        # (una sola búsqueda localiza ambos marcadores)
+        fence_match = JSON_FENCE_RE.search(response_text)
+        if fence_match and fence_match.group(1):
+            json_text = fence_match.group(1).strip()
+            # Intento de análisis con este método
+            try:
+                segments = json_loads(json_text)
+                return segments
+            except Exception as e:
+                print(f"{Fore.YELLOW}Error en el primer método de extracción: {e}")
         
         # Segundo intento: buscar corchetes de apertura y cierre de un array JSON
         start_idx = response_text.find("[")
@@ -144,13 +271,11 @@ def extract_json_from_response(response_text):
             json_text = response_text[start_idx:end_idx].strip()
             try:
                 # Limpiar posibles comentarios de estilo JavaScript
-                # Encontrar y eliminar líneas que comiencen con //
-                lines = json_text.split('\n')
-                filtered_lines = [line for line in lines if not line.strip().startswith('//')]
-                cleaned_json = '\n'.join(filtered_lines)
+                # Eliminar las líneas que comiencen con // en una sola pasada
+                cleaned_json = COMMENT_LINE_RE.sub('', json_text)
                 
                 # Intento de análisis después de limpieza
-                segments = json.loads(cleaned_json)
+                segments = json_loads(cleaned_json)
                 return segments
             except Exception as e:
                 print(f"{Fore.YELLOW}Error en el segundo método de extracción: {e}")
@@ -158,23 +283,21 @@ def extract_json_from_response(response_text):
                 # Intento avanzado: buscar y corregir errores comunes de formato
                 try:
                     # Intento de corrección manual del JSON
-                    # 1. Eliminar comas extras al final de objetos JSON
-                    corrected_json = re.sub(r',\s*}', '}', cleaned_json)
-                    corrected_json = re.sub(r',\s*\]', ']', corrected_json)
+                    # 1. Eliminar comas extras al final de objetos y arrays JSON (una sola pasada)
+                    corrected_json = TRAILING_COMMA_RE.sub(r'\1', cleaned_json)
                     
                     # 2. Asegurar que las propiedades tengan el formato correcto
-                    corrected_json = re.sub(r'([\w]+)\s*:', r'"\1":', corrected_json)
+                    corrected_json = UNQUOTED_KEY_RE.sub(r'"\1":', corrected_json)
                     
                     # Intento final con el JSON corregido
-                    segments = json.loads(corrected_json)
+                    segments = json_loads(corrected_json)
                     print(f"{Fore.GREEN}Corrección automática del JSON exitosa")
                     return segments
                 except Exception as e:
                     print(f"{Fore.YELLOW}Error en la corrección automática: {e}")
         
         # Guardar la respuesta para depuración
-        debug_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                 "debug_claude_response.txt")
+        debug_path = os.path.join(BASE_DIR, "debug_claude_response.txt")
         with open(debug_path, 'w', encoding='utf-8') as f:
             f.write(response_text)
         print(f"{Fore.YELLOW}Respuesta guardada en {debug_path} para depuración")
@@ -184,17 +307,16 @@ def extract_json_from_response(response_text):
         
         # Buscar segmentos de texto que parezcan objetos JSON
         segments = []
-        pattern = r'\{[^\{\}]*"text"\s*:\s*"[^"]*"[^\{\}]*\}'
-        matches = re.finditer(pattern, response_text)
+        matches = SEGMENT_OBJECT_RE.finditer(response_text)
         
         for match in matches:
             try:
                 obj_text = match.group(0)
                 # Intentar extraer los valores clave
-                text_match = re.search(r'"text"\s*:\s*"([^"]*)"', obj_text)
-                score_match = re.search(r'"score"\s*:\s*(\d+)', obj_text)
-                reasons_match = re.search(r'"reasons"\s*:\s*"([^"]*)"', obj_text)
-                marker_match = re.search(r'"marker_phrase"\s*:\s*"([^"]*)"', obj_text)
+                text_match = TEXT_FIELD_RE.search(obj_text)
+                score_match = SCORE_FIELD_RE.search(obj_text)
+                reasons_match = REASONS_FIELD_RE.search(obj_text)
+                marker_match = MARKER_FIELD_RE.search(obj_text)
                 
                 if text_match and score_match and marker_match:
                     segment = {
@@ -217,19 +339,25 @@ def extract_json_from_response(response_text):
         print(f"{Fore.RED}Error general al extraer JSON: {e}")
         return None
 
-def find_segment_in_words(segment, words_data):
-    """Encuentra un segmento en la lista de palabras y obtiene las marcas de tiempo."""
+def find_segment_in_words(segment, words_data, full_text_lower=None, lowered_words=None, sentence_ends=None):
+    """Encuentra un segmento en la lista de palabras y obtiene las marcas de tiempo.
+    
+    full_text_lower, lowered_words y sentence_ends pueden venir ya calculados
+    por el llamador para no reconstruirlos en cada segmento.
+    """
     try:
         # Obtener la frase marcadora y el texto completo del segmento
         marker_phrase = segment["marker_phrase"]
         segment_text = segment["text"]
         
-        # Construir texto completo para búsqueda
-        full_text = " ".join(word["text"] for word in words_data)
+        # Texto completo en minúsculas para las búsquedas de marcadores, que son
+        # insensibles a mayúsculas (si no se recibió ya hecho)
+        if full_text_lower is None:
+            full_text_lower = " ".join([word["text"] for word in words_data]).lower()
         
         # Verificar si la frase marcadora exacta está en el texto (case-insensitive)
         marker_found = False
-        if marker_phrase.lower() in full_text.lower():
+        if marker_phrase.lower() in full_text_lower:
             marker_found = True
             print(f"{Fore.GREEN}Frase marcadora encontrada: '{marker_phrase}'")
         else:
@@ -242,7 +370,7 @@ def find_segment_in_words(segment, words_data):
                 # Intentar con diferentes subconjuntos de palabras (al menos 3 palabras consecutivas)
                 for i in range(len(marker_words) - 2):
                     partial_marker = " ".join(marker_words[i:i+3])
-                    if partial_marker.lower() in full_text.lower():
+                    if partial_marker in full_text_lower:
                         print(f"{Fore.GREEN}Coincidencia parcial encontrada: '{partial_marker}'")
                         marker_phrase = partial_marker
                         marker_found = True
@@ -251,7 +379,7 @@ def find_segment_in_words(segment, words_data):
             # 2. Si aún no hay coincidencia, buscar las primeras palabras del segmento
             if not marker_found and len(segment_text.split()) >= 5:
                 start_words = " ".join(segment_text.split()[:5])
-                if start_words.lower() in full_text.lower():
+                if start_words.lower() in full_text_lower:
                     print(f"{Fore.GREEN}Usando primeras palabras del segmento como marcador: '{start_words[:30]}...'")
                     marker_phrase = start_words
                     marker_found = True
@@ -259,8 +387,9 @@ def find_segment_in_words(segment, words_data):
                     # 3. Intentar con combinaciones de palabras aleatorias del segmento
                     segment_unique_words = [w.lower() for w in segment_text.split() if len(w) > 5]
                     for word in segment_unique_words[:10]:  # Probar con las primeras 10 palabras distintivas
-                        if word.lower() in full_text.lower() and len(word) > 5:  # Solo palabras significativas
-                            surrounding_text = full_text.lower()[max(0, full_text.lower().find(word.lower())-40):full_text.lower().find(word.lower())+40]
+                        word_position = full_text_lower.find(word)
+                        if word_position != -1 and len(word) > 5:  # Solo palabras significativas
+                            surrounding_text = full_text_lower[max(0, word_position-40):word_position+40]
                             print(f"{Fore.GREEN}Palabra clave encontrada: '{word}' en contexto: '...{surrounding_text}...'")
                             marker_phrase = word
                             marker_found = True
@@ -293,46 +422,61 @@ def find_segment_in_words(segment, words_data):
         last_words = segment_words[-min(10, len(segment_words)):] if len(segment_words) >= 10 else segment_words
         last_phrase = " ".join(last_words).lower()
         
+        # Palabras de la transcripción en minúsculas: las ventanas se toman como
+        # porciones de esta lista en lugar de unir y volver a dividir texto
+        if lowered_words is None:
+            lowered_words = [word["text"].lower() for word in words_data]
+        
+        # Qué palabras cierran una oración: se evalúa una vez por palabra
+        # en lugar de repetir strip()/endswith() en cada búsqueda de punto
+        if sentence_ends is None:
+            sentence_ends = [word["text"].strip().endswith(SENTENCE_END) for word in words_data]
+        
+        # Palabras de las frases buscadas: se calculan una sola vez, no en cada ventana
+        first_phrase_words = set(first_phrase.split())
+        last_phrase_words = set(last_phrase.split())
+        
+        # Valores fijos del segmento: se calculan una vez en lugar de en cada
+        # iteración de las búsquedas de inicio y final
+        marker_lower = marker_phrase.lower()
+        first_len = len(first_words)
+        last_len = len(last_words)
+        first_total = max(len(first_phrase_words), 1)
+        last_total = max(len(last_phrase_words), 1)
+        total_words = len(words_data)
+        
         # Buscar el inicio del segmento con mejor tolerancia a pequeñas diferencias
         best_match_score = 0
-        for i in range(len(words_data) - len(first_words) + 1):
-            window = " ".join(words_data[j]["text"].lower() for j in range(i, min(i + len(first_words), len(words_data))))
+        best_match_index = None
+        for i in range(total_words - first_len + 1):
+            window_words = lowered_words[i:i + first_len]
             
             # Calcular similitud usando una métrica simple de palabras coincidentes
-            phrase_words = set(first_phrase.split())
-            window_words = set(window.split())
-            common_words = phrase_words.intersection(window_words)
-            match_score = len(common_words) / max(len(phrase_words), 1)
+            common_words = first_phrase_words.intersection(window_words)
+            match_score = len(common_words) / first_total
             
             if match_score > 0.7:  # Al menos 70% de palabras coincidentes
                 segment_start = i
                 print(f"{Fore.GREEN}Inicio encontrado en palabra {i} (coincidencia {match_score:.2f}): '{words_data[i]['text']}...'")
                 break
             elif match_score > best_match_score:
+                # Recordar dónde está el mejor match para no recorrer el texto otra vez
                 best_match_score = match_score
+                best_match_index = i
         
         # Si no encontramos el inicio exacto, intentar con la frase marcadora
         if segment_start is None:
             if best_match_score > 0.5:  # Usar el mejor match si tiene al menos 50% de coincidencia
-                for i in range(len(words_data) - len(first_words) + 1):
-                    window = " ".join(words_data[j]["text"].lower() for j in range(i, min(i + len(first_words), len(words_data))))
-                    phrase_words = set(first_phrase.split())
-                    window_words = set(window.split())
-                    common_words = phrase_words.intersection(window_words)
-                    match_score = len(common_words) / max(len(phrase_words), 1)
-                    
-                    if match_score == best_match_score:
-                        segment_start = i
-                        print(f"{Fore.YELLOW}Usando mejor coincidencia aproximada ({match_score:.2f}): '{words_data[i]['text']}...'")
-                        break
+                segment_start = best_match_index
+                print(f"{Fore.YELLOW}Usando mejor coincidencia aproximada ({best_match_score:.2f}): '{words_data[segment_start]['text']}...'")
             else:  # Buscar por la frase marcadora
                 # Buscar la frase marcadora en el texto
-                for i in range(len(words_data) - 5):
-                    text_window = " ".join(words_data[j]["text"].lower() for j in range(i, min(i+10, len(words_data))))
-                    if marker_phrase.lower() in text_window:
+                for i in range(total_words - 5):
+                    text_window = " ".join(lowered_words[i:i+10])
+                    if marker_lower in text_window:
                         # Retroceder para encontrar el inicio de una oración
                         for j in range(i, max(0, i-50), -1):
-                            if j > 0 and words_data[j-1]["text"].strip().endswith(('.', '!', '?')):
+                            if j > 0 and sentence_ends[j-1]:
                                 segment_start = j  # Comenzar después del punto
                                 print(f"{Fore.GREEN}Inicio alternativo encontrado después de punto: '{words_data[segment_start]['text']}...'")
                                 break
@@ -350,19 +494,18 @@ def find_segment_in_words(segment, words_data):
         
         # Buscar el final del segmento con mejor tolerancia a diferencias
         best_match_score = 0
-        for i in range(segment_start + len(first_words), len(words_data) - len(last_words) + 1):
-            window = " ".join(words_data[j]["text"].lower() for j in range(i, min(i + len(last_words), len(words_data))))
+        best_match_index = None
+        for i in range(segment_start + first_len, total_words - last_len + 1):
+            window_words = lowered_words[i:i + last_len]
             
             # Calcular similitud usando una métrica simple de palabras coincidentes
-            phrase_words = set(last_phrase.split())
-            window_words = set(window.split())
-            common_words = phrase_words.intersection(window_words)
-            match_score = len(common_words) / max(len(phrase_words), 1)
+            common_words = last_phrase_words.intersection(window_words)
+            match_score = len(common_words) / last_total
             
             if match_score > 0.7:  # Al menos 70% de palabras coincidentes
                 # Buscar un punto final después de este match
-                for j in range(i + len(last_words) - 1, min(i + len(last_words) + 15, len(words_data))):
-                    if words_data[j]["text"].strip().endswith(('.', '!', '?')):
+                for j in range(i + last_len - 1, min(i + last_len + 15, total_words)):
+                    if sentence_ends[j]:
                         segment_end = j
                         print(f"{Fore.GREEN}Final encontrado en palabra {j} (coincidencia {match_score:.2f}): '...{words_data[j]['text']}'")
                         break
@@ -370,48 +513,40 @@ def find_segment_in_words(segment, words_data):
                 if segment_end is not None:
                     break
                 else:  # Si no encontramos un punto final claro, usar una aproximación
-                    segment_end = min(i + len(last_words) + 10, len(words_data) - 1)
+                    segment_end = min(i + last_len + 10, total_words - 1)
                     print(f"{Fore.YELLOW}Final aproximado sin punto encontrado: '...{words_data[segment_end]['text']}'")
                     break
             elif match_score > best_match_score:
                 best_match_score = match_score
+                best_match_index = i
         
         # Si no encontramos el final exacto, intentar estrategias alternativas
         if segment_end is None:
             if best_match_score > 0.5:  # Usar el mejor match si tiene al menos 50% de coincidencia
-                for i in range(segment_start + len(first_words), len(words_data) - len(last_words) + 1):
-                    window = " ".join(words_data[j]["text"].lower() for j in range(i, min(i + len(last_words), len(words_data))))
-                    phrase_words = set(last_phrase.split())
-                    window_words = set(window.split())
-                    common_words = phrase_words.intersection(window_words)
-                    match_score = len(common_words) / max(len(phrase_words), 1)
-                    
-                    if match_score == best_match_score:
-                        # Buscar un punto final después de este match
-                        for j in range(i + len(last_words) - 1, min(i + len(last_words) + 15, len(words_data))):
-                            if words_data[j]["text"].strip().endswith(('.', '!', '?')):
-                                segment_end = j
-                                print(f"{Fore.YELLOW}Usando mejor coincidencia aproximada para final ({match_score:.2f}): '...{words_data[j]['text']}'")
-                                break
-                        
-                        if segment_end is None:  # Si no encontramos punto, aproximar
-                            segment_end = min(i + len(last_words) + 5, len(words_data) - 1)
-                            print(f"{Fore.YELLOW}Usando final aproximado sin punto: '...{words_data[segment_end]['text']}'")
-                        
+                i = best_match_index
+                # Buscar un punto final después de este match
+                for j in range(i + last_len - 1, min(i + last_len + 15, total_words)):
+                    if sentence_ends[j]:
+                        segment_end = j
+                        print(f"{Fore.YELLOW}Usando mejor coincidencia aproximada para final ({best_match_score:.2f}): '...{words_data[j]['text']}'")
                         break
+                
+                if segment_end is None:  # Si no encontramos punto, aproximar
+                    segment_end = min(i + last_len + 5, total_words - 1)
+                    print(f"{Fore.YELLOW}Usando final aproximado sin punto: '...{words_data[segment_end]['text']}'")
             else:  # Buscar por la frase marcadora y localizar un punto después
                 # Encontrar la ubicación aproximada de la frase marcadora
                 marker_index = None
-                for i in range(segment_start, len(words_data) - 5):
-                    text_window = " ".join(words_data[j]["text"].lower() for j in range(i, min(i+10, len(words_data))))
-                    if marker_phrase.lower() in text_window:
+                for i in range(segment_start, total_words - 5):
+                    text_window = " ".join(lowered_words[i:i+10])
+                    if marker_lower in text_window:
                         marker_index = i
                         break
                 
                 if marker_index is not None:
                     # Buscar un punto después del marcador hasta un máximo de 100 palabras
-                    for i in range(marker_index, min(marker_index + 100, len(words_data))):
-                        if words_data[i]["text"].strip().endswith(('.', '!', '?')):
+                    for i in range(marker_index, min(marker_index + 100, total_words)):
+                        if sentence_ends[i]:
                             segment_end = i
                             print(f"{Fore.GREEN}Final alternativo encontrado después de marcador: '...{words_data[i]['text']}'")
                             break
@@ -420,24 +555,24 @@ def find_segment_in_words(segment, words_data):
                 if segment_end is None:
                     # Estimación basada en duración esperada (aprox. 30-60 segundos de audio)
                     estimated_word_count = min(70, max(40, len(segment_text.split())))  # ~40-70 palabras
-                    segment_end = min(len(words_data) - 1, segment_start + estimated_word_count)
+                    segment_end = min(total_words - 1, segment_start + estimated_word_count)
                     
                     # Buscar el siguiente punto después de esta posición estimada
                     for i in range(segment_end, max(segment_start, segment_end - 20), -1):
-                        if i < len(words_data) and words_data[i]["text"].strip().endswith(('.', '!', '?')):
+                        if i < total_words and sentence_ends[i]:
                             segment_end = i
                             print(f"{Fore.YELLOW}Final estimado por longitud: '...{words_data[i]['text']}'")
                             break
                     
-                    if segment_end >= len(words_data) or not words_data[segment_end]["text"].strip().endswith(('.', '!', '?')):
+                    if segment_end >= total_words or not sentence_ends[segment_end]:
                         print(f"{Fore.YELLOW}No se encontró punto al final - usando aproximación")
-                        segment_end = min(len(words_data) - 1, segment_start + 60)
+                        segment_end = min(total_words - 1, segment_start + 60)
         
         # Asegurar que el segmento termina en un punto gramatical completo
         # Retroceder hasta encontrar un punto, signo de exclamación o interrogación
         original_end = segment_end
         while segment_end > segment_start:
-            if words_data[segment_end]["text"].strip().endswith(('.', '!', '?')):
+            if sentence_ends[segment_end]:
                 break
             segment_end -= 1
         
@@ -451,7 +586,7 @@ def find_segment_in_words(segment, words_data):
             print(f"{Fore.YELLOW}Duración {current_duration:.1f}s excede el límite. Ajustando...")
             # Buscar un punto anterior que mantenga la duración dentro del límite
             for i in range(segment_end, segment_start, -1):
-                if words_data[i]["text"].strip().endswith(('.', '!', '?')):
+                if sentence_ends[i]:
                     new_duration = (words_data[i]["end"] - words_data[segment_start]["start"]) / 1000
                     if new_duration <= max_allowed_duration:
                         segment_end = i
@@ -465,8 +600,8 @@ def find_segment_in_words(segment, words_data):
             print(f"{Fore.YELLOW}Duración {current_duration:.1f}s es muy corta. Intentando extender...")
             # Buscar un punto posterior para extender la duración si es posible
             original_end = segment_end
-            for i in range(segment_end + 1, min(segment_end + 50, len(words_data))):
-                if words_data[i]["text"].strip().endswith(('.', '!', '?')):
+            for i in range(segment_end + 1, min(segment_end + 50, total_words)):
+                if sentence_ends[i]:
                     new_duration = (words_data[i]["end"] - words_data[segment_start]["start"]) / 1000
                     if new_duration >= min_preferred_duration:
                         segment_end = i
@@ -477,10 +612,10 @@ def find_segment_in_words(segment, words_data):
         # Calcular tiempos y texto final
         start_time = words_data[segment_start]["start"] / 1000  # convertir a segundos
         end_time = words_data[segment_end]["end"] / 1000  # convertir a segundos
-        exact_text = " ".join(word["text"] for word in words_data[segment_start:segment_end+1])
+        exact_text = " ".join([word["text"] for word in words_data[segment_start:segment_end+1]])
         
         # Verificar que el texto termine en un punto gramatical correcto
-        if not exact_text.strip().endswith(('.', '!', '?')):
+        if not exact_text.strip().endswith(SENTENCE_END):
             print(f"{Fore.YELLOW}Advertencia: El segmento no termina con punto. Buscando un mejor final...")
             # Encontrar el último punto dentro del texto
             last_punct = max(exact_text.rfind('.'), exact_text.rfind('!'), exact_text.rfind('?'))
@@ -502,23 +637,15 @@ def find_segment_in_words(segment, words_data):
             print(f"{Fore.YELLOW}Eliminado conector inicial: '{first_word}'")
         
         # Verificar que el texto no termine con una palabra incompleta o conector suelto
-        if not exact_text.endswith(('.', '!', '?')):
+        if not exact_text.endswith(SENTENCE_END):
             # Buscar el último punto
             last_punct = max(exact_text.rfind('.'), exact_text.rfind('!'), exact_text.rfind('?'))
             if last_punct > 0:
                 exact_text = exact_text[:last_punct + 1]
-
-        # Verificar que el texto no termine con una palabra incompleta o conector suelto
-            if not exact_text.endswith(('.', '!', '?')):
-                # Buscar el último punto
-                last_punct = max(exact_text.rfind('.'), exact_text.rfind('!'), exact_text.rfind('?'))
-                if last_punct > 0:
-                    exact_text = exact_text[:last_punct + 1]
-                    print(f"{Fore.GREEN}Texto ajustado para terminar en punto gramatical")
-                else:
-                    # Si no hay punto, agregar uno
-                    exact_text += '.'
-                    print(f"{Fore.YELLOW}Añadido punto final")
+            else:
+                # Si no hay punto, agregar uno
+                exact_text += '.'
+                print(f"{Fore.YELLOW}Añadido punto final")
 
         # Realizar análisis final de calidad del segmento
         sentence_count = exact_text.count('.') + exact_text.count('!') + exact_text.count('?')
@@ -548,7 +675,7 @@ def find_segment_in_words(segment, words_data):
         print(f"{Fore.RED}Detalles: {str(e)}")
         return None
 
-def process_claude_response(response_text, transcription_data):
+def process_claude_response(response_text, transcription_data, full_text=None):
     """Procesa la respuesta de Claude y mapea los segmentos a marcas de tiempo."""
     try:
         # Extraer segmentos de la respuesta
@@ -559,15 +686,41 @@ def process_claude_response(response_text, transcription_data):
         # Obtener lista de palabras
         words_data = transcription_data["words"]
 
+        # Texto completo y palabras en minúsculas: se preparan una sola vez
+        # y se comparten entre todos los segmentos
+        if full_text is None:
+            full_text = " ".join([word["text"] for word in words_data])
+        full_text_lower = full_text.lower()
+        lowered_words = [word["text"].lower() for word in words_data]
+        sentence_ends = [word["text"].strip().endswith(SENTENCE_END) for word in words_data]
+
         # Mapear cada segmento a marcas de tiempo
         timed_segments = []
 
+        # Claude a veces repite un mismo pasaje: los duplicados se descartan por
+        # texto antes de la búsqueda y por rango de palabras después de ella,
+        # para no generar dos veces el mismo reel (SRT, TXT y ffmpeg)
+        seen_texts = set()
+        seen_ranges = set()
+
         for segment in segments:
+            text_key = " ".join(segment['text'].lower().split())
+            if text_key in seen_texts:
+                print(f"{Fore.YELLOW}Segmento repetido omitido: \"{segment['text'][:100]}...\"")
+                continue
+            seen_texts.add(text_key)
+
             print(f"{Fore.CYAN}Procesando segmento con puntuación {segment['score']}...")
             print(f"{Fore.CYAN}Inicio del texto: \"{segment['text'][:100]}...\"")
 
-            timed_segment = find_segment_in_words(segment, words_data)
+            timed_segment = find_segment_in_words(segment, words_data, full_text_lower, lowered_words, sentence_ends)
             if timed_segment:
+                word_range = (timed_segment["start_word_index"], timed_segment["end_word_index"])
+                if word_range in seen_ranges:
+                    print(f"{Fore.YELLOW}  Segmento omitido: corresponde al mismo fragmento que uno anterior")
+                    continue
+                seen_ranges.add(word_range)
+
                 # Aceptamos segmentos de cualquier duración, pero informamos
                 duration = timed_segment["duration"]
                 if duration < 15:  # menos de 15 segundos es muy corto
@@ -595,10 +748,12 @@ def process_claude_response(response_text, transcription_data):
 
 def format_time_srt(seconds):
     """Convierte segundos a formato HH:MM:SS,mmm para SRT"""
-    hours, remainder = divmod(int(seconds), 3600)
-    minutes, seconds = divmod(remainder, 60)
-    milliseconds = int((seconds - int(seconds)) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
+    # Aritmética entera sobre milisegundos (sin perder la parte fraccionaria)
+    total_ms = int(round(seconds * 1000))
+    hours, remainder = divmod(total_ms, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    secs, milliseconds = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
 
 def generate_srt_file(segment, output_path, index):
     """Genera un archivo SRT para un segmento."""
@@ -610,20 +765,21 @@ def generate_srt_file(segment, output_path, index):
         # Dividir texto largo en líneas
         text = segment["text"]
         if len(text) > 40:
-            words = text.split()
+            # Partir en el espacio más cercano a la mitad (búsqueda directa en el texto)
             half_length = len(text) // 2
-            current_length = 0
-            split_index = 0
+            left = text.rfind(' ', 0, half_length)
+            right = text.find(' ', half_length)
 
-            for i, word in enumerate(words):
-                current_length += len(word) + (1 if i > 0 else 0)
-                if current_length > half_length:
-                    split_index = i
-                    break
+            if left == -1:
+                split_index = right
+            elif right == -1 or (half_length - left) <= (right - half_length):
+                split_index = left
+            else:
+                split_index = right
 
             if split_index > 0:
-                line1 = " ".join(words[:split_index])
-                line2 = " ".join(words[split_index:])
+                line1 = text[:split_index].rstrip()
+                line2 = text[split_index:].lstrip()
                 text = f"{line1}\n{line2}"
 
         content = f"1\n{start_srt} --> {end_srt}\n{text}\n\n"
@@ -671,6 +827,27 @@ def extract_audio_segment(audio_path, segment, output_dir, index):
 
         output_file = os.path.join(output_dir, f"reel_{index:02d}.mp3")
 
+        # Huella del recorte (audio de origen y tiempos): si el MP3 ya existe con
+        # la misma huella, se reutiliza en lugar de volver a lanzar ffmpeg
+        stamp_path = f"{output_file}.stamp"
+        audio_stat = os.stat(audio_path)
+        stamp = hashlib.blake2b(
+            f"{audio_path}|{audio_stat.st_size}|{audio_stat.st_mtime_ns}|{start_time}|{duration}".encode('utf-8'),
+            digest_size=16,
+        ).hexdigest()
+        if os.path.exists(output_file):
+            try:
+                with open(stamp_path, 'r', encoding='utf-8') as f:
+                    if f.read() == stamp:
+                        return output_file
+            except OSError:
+                pass
+            # La huella no coincide: se descarta antes de regenerar el MP3
+            try:
+                os.remove(stamp_path)
+            except OSError:
+                pass
+
         cmd = [
             "ffmpeg",
             "-i", audio_path,
@@ -692,37 +869,61 @@ def extract_audio_segment(audio_path, segment, output_dir, index):
 
         if process.returncode != 0:
             print(f"{Fore.YELLOW}Advertencia en ffmpeg: {process.stderr[:150]}...")
+        else:
+            with open(stamp_path, 'w', encoding='utf-8') as f:
+                f.write(stamp)
 
         return output_file
     except Exception as e:
         print(f"{Fore.RED}Error al extraer segmento de audio: {e}")
         return None
 
-def process_sermon(sermon_dir, claude_client):
-    """Procesa un sermón completo para extraer segmentos para reels."""
+def generate_reel_files(segment, index, audio_path, text_dir, audio_dir):
+    """Genera el SRT, el TXT y el MP3 de un segmento. Devuelve las tres rutas."""
+    srt_path = generate_srt_file(segment, text_dir, index)
+    txt_path = generate_txt_file(segment, text_dir, index)
+    audio_segment_path = extract_audio_segment(audio_path, segment, audio_dir, index)
+    return srt_path, txt_path, audio_segment_path
+
+def process_sermon(sermon_dir, claude_client=None, force=False):
+    """Procesa un sermón completo para extraer segmentos para reels.
+    
+    Si no se pasa claude_client, se crea solo cuando hace falta llamar a la API.
+    Con force=True se ignora la respuesta guardada en caché y se vuelve a
+    consultar a Claude.
+    """
     try:
         # Estructurar rutas
         json_dir = os.path.join(sermon_dir, "json")
         audio_dir = os.path.join(sermon_dir, "audio")
         text_dir = os.path.join(sermon_dir, "text")
 
-        # Crear carpeta de reels si no existe
+        # Crear las carpetas de reels antes de repartir el trabajo entre hilos
+        # (makedirs de las subcarpetas crea también reels/)
         reels_dir = os.path.join(sermon_dir, "reels")
-        os.makedirs(reels_dir, exist_ok=True)
         reels_audio_dir = os.path.join(reels_dir, "audio")
         os.makedirs(reels_audio_dir, exist_ok=True)
         reels_text_dir = os.path.join(reels_dir, "text")
         os.makedirs(reels_text_dir, exist_ok=True)
 
-        # Buscar archivo JSON
-        json_files = [f for f in os.listdir(json_dir) if f.endswith('.json')]
-        if not json_files:
+        # Buscar archivo JSON: una sola pasada con os.scandir, quedándonos con
+        # el más reciente (stat() de DirEntry no repite la llamada al sistema)
+        latest_entry = None
+        latest_mtime = -1.0
+        with os.scandir(json_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.is_file():
+                    mtime = entry.stat().st_mtime
+                    if mtime > latest_mtime:
+                        latest_entry = entry
+                        latest_mtime = mtime
+        if latest_entry is None:
             print(f"{Fore.RED}No se encontraron archivos JSON en {json_dir}")
             return False
 
-        # Seleccionar el primer archivo JSON (normalmente solo hay uno)
-        json_file = json_files[0]
-        json_path = os.path.join(json_dir, json_file)
+        # Seleccionar el JSON más reciente (normalmente solo hay uno)
+        json_file = latest_entry.name
+        json_path = latest_entry.path
 
         # Cargar transcripción
         print(f"{Fore.CYAN}Cargando transcripción desde {json_file}...")
@@ -742,65 +943,75 @@ def process_sermon(sermon_dir, claude_client):
         # Preparar texto para Claude
         print(f"{Fore.CYAN}Preparando texto para análisis...")
 
-        # Construir texto completo a partir de words
-        full_text = " ".join(word["text"] for word in transcription_data["words"])
+        # Construir texto completo a partir de words (join sobre una lista ya
+        # construida: str.join materializa los generadores de todos modos)
+        full_text = " ".join([word["text"] for word in transcription_data["words"]])
 
         # Crear prompt para Claude
         prompt = create_claude_prompt(full_text)
 
-        # Llamar a la API de Claude
-        print(f"{Fore.CYAN}Enviando a Claude para análisis (esto puede tomar un momento)...")
-        try:
-            response = claude_client.messages.create(
-                model="claude-3-5-sonnet-20240620",  # Usar un modelo más reciente con mejor soporte para JSON
-                max_tokens=4000,
-                system="Por favor, analízate el sermón y extrae segmentos siguiendo las instrucciones. Asegúrate de responder SOLO en formato JSON válido dentro de marcadores ```json. Es crucial que el JSON esté bien formateado sin comentarios ni caracteres adicionales.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            response_text = response.content[0].text
-        except Exception as e:
-            print(f"{Fore.RED}Error al llamar a la API de Claude: {e}")
-            return False
+        # Reutilizar la respuesta si este mismo prompt ya se analizó antes
+        response_text = None if force else load_cached_response(prompt)
+        from_cache = response_text is not None
+        if from_cache:
+            print(f"{Fore.GREEN}Usando respuesta de Claude guardada en caché (sin llamar a la API)")
+        else:
+            # Llamar a la API de Claude
+            if claude_client is None:
+                claude_client = setup_claude_client()
+            print(f"{Fore.CYAN}Enviando a Claude para análisis (esto puede tomar un momento)...")
+            try:
+                response_text = request_claude_analysis(claude_client, prompt)
+            except Exception as e:
+                print(f"{Fore.RED}Error al llamar a la API de Claude: {e}")
+                return False
 
         # Procesar respuesta
         print(f"{Fore.CYAN}Procesando respuesta de Claude...")
-        segments = process_claude_response(response_text, transcription_data)
+        segments = process_claude_response(response_text, transcription_data, full_text)
 
         if not segments:
             print(f"{Fore.RED}No se identificaron segmentos válidos")
             return False
 
+        # Solo se guardan en caché respuestas que produjeron segmentos válidos
+        if not from_cache:
+            save_cached_response(prompt, response_text)
+
         # Ordenar segmentos por puntuación
         segments.sort(key=lambda x: x["score"], reverse=True)
 
         # Guardar el JSON de segmentos
         segments_json_path = os.path.join(reels_dir, "reel_segments.json")
-        with open(segments_json_path, 'w', encoding='utf-8') as f:
-            json.dump(segments, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(segments_json_path, 'wb') as f:
+                f.write(orjson.dumps(segments, option=orjson.OPT_INDENT_2))
+        else:
+            with open(segments_json_path, 'w', encoding='utf-8') as f:
+                json.dump(segments, f, ensure_ascii=False, indent=2)
 
         print(f"{Fore.GREEN}JSON de segmentos guardado en: {segments_json_path}")
 
         # Generar archivos para cada segmento
         print(f"{Fore.GREEN}Generando archivos para {len(segments)} segmentos...")
 
-        for i, segment in enumerate(segments, 1):
-            print(f"{Fore.CYAN}Procesando segmento {i}/{len(segments)}...")
-
-            # Generar SRT
-            srt_path = generate_srt_file(segment, reels_text_dir, i)
-
-            # Generar TXT
-            txt_path = generate_txt_file(segment, reels_text_dir, i)
-
-            # Extraer audio
-            audio_segment_path = extract_audio_segment(audio_path, segment, reels_audio_dir, i)
-
-            if srt_path and txt_path and audio_segment_path:
-                print(f"{Fore.GREEN}  - Archivos generados: SRT, TXT y MP3")
-            else:
-                print(f"{Fore.YELLOW}  - Algunos archivos no se generaron correctamente")
+        # Los segmentos son independientes entre sí: se procesan varios a la vez,
+        # con un máximo de MAX_PARALLEL_REELS procesos de ffmpeg simultáneos
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REELS) as executor:
+            futures = [
+                executor.submit(generate_reel_files, segment, i, audio_path, reels_text_dir, reels_audio_dir)
+                for i, segment in enumerate(segments, 1)
+            ]
+
+            # Informar en el orden de los segmentos
+            for i, future in enumerate(futures, 1):
+                srt_path, txt_path, audio_segment_path = future.result()
+                print(f"{Fore.CYAN}Segmento {i}/{len(segments)}:")
+
+                if srt_path and txt_path and audio_segment_path:
+                    print(f"{Fore.GREEN}  - Archivos generados: SRT, TXT y MP3")
+                else:
+                    print(f"{Fore.YELLOW}  - Algunos archivos no se generaron correctamente")
 
         print(f"\n{Fore.GREEN}{Style.BRIGHT}¡Proceso completado con éxito!")
         print(f"{Fore.CYAN}Segmentos identificados: {len(segments)}")
@@ -819,12 +1030,10 @@ def main():
     print(f"{Fore.CYAN}{Style.BRIGHT}" + "="*60)
     print()
 
-    # Configurar cliente de Claude
-    claude_client = setup_claude_client()
-
     # Configurar rutas
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    output_dir = os.path.join(base_dir, "data", "output")
+    output_dir = OUTPUT_DIR
+    # --force vuelve a consultar a Claude aunque haya una respuesta en caché
+    force = "--force" in sys.argv[1:]
 
     # Verificar que existe la carpeta
     if not os.path.isdir(output_dir):
@@ -833,8 +1042,9 @@ def main():
 
     # Listar sermones disponibles
     try:
-        sermon_dirs = [d for d in os.listdir(output_dir) if os.path.isdir(os.path.join(output_dir, d)) and d.startswith('sermon_')]
-        sermon_dirs.sort()
+        # scandir trae el tipo de cada entrada en la misma lectura del directorio
+        with os.scandir(output_dir) as entries:
+            sermon_dirs = sorted(e.name for e in entries if e.name.startswith('sermon_') and e.is_dir())
     except Exception as e:
         print(f"{Fore.RED}Error al listar sermones: {e}")
         sys.exit(1)
@@ -868,7 +1078,8 @@ def main():
     sermon_path = os.path.join(output_dir, selected_sermon)
     print(f"\n{Fore.CYAN}{Style.BRIGHT}Procesando: {selected_sermon}")
 
-    success = process_sermon(sermon_path, claude_client)
+    # El cliente de Claude se configura dentro, solo si la respuesta no está en caché
+    success = process_sermon(sermon_path, force=force)
 
     if success:
         print(f"\n{Fore.GREEN}{Style.BRIGHT}¡Extracción de reels completada con éxito!")
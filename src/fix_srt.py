@@ -3,28 +3,27 @@ import sys
 import json
 import subprocess
 import time # Importar time para usarlo en _generate_srt...
-from datetime import timedelta, datetime
-from colorama import init, Fore, Style
+from datetime import datetime
 
-# Inicializar colorama
-init(autoreset=True)
+# orjson es opcional: acelera la lectura del JSON editado
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def format_time_srt(seconds_float):
-    """Convierte segundos (float) a formato HH:MM:SS,mmm para SRT"""
-    try:
-        if not isinstance(seconds_float, (int, float)):
-            seconds_float = float(seconds_float)
-        if seconds_float < 0: seconds_float = 0.0
-        delta = timedelta(seconds=seconds_float)
-        # Ajuste para obtener partes de tiempo
-        total_seconds = int(delta.total_seconds())
-        hours, remainder = divmod(total_seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        milliseconds = delta.microseconds // 1000 # Microsegundos de la parte fraccionaria
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
-    except (ValueError, TypeError) as e:
-        print(f"{Fore.RED}Error formateando tiempo '{seconds_float}': {e}. Usando 00:00:00,000.")
-        return "00:00:00,000"
+# Colores de consola (sin colorama cuando la salida no es una terminal)
+from console_colors import Fore, Style
+
+# Rutas del proyecto (se calculan una sola vez al importar)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_DIR = os.path.join(BASE_DIR, "data", "output")
+
+def format_ms_srt(milliseconds):
+    """Convierte milisegundos (int, ya validados) a formato HH:MM:SS,mmm para SRT"""
+    hours, remainder = divmod(milliseconds, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    seconds, millis = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
 
 def format_multi_line(text, max_chars_per_line=40):
     """
@@ -73,9 +72,19 @@ def generate_srt_entries_from_words(words_list):
 
     srt_blocks = []
     current_block_words_text = [] # Lista de strings de palabras editadas
+    current_block_chars = 0 # Longitud de " ".join(current_block_words_text)
     current_block_start_ms = -1
     last_word_end_ms = -1
     entry_index = 1
+    # Índices de palabras omitidas por tiempos inválidos: se informa una sola
+    # vez al final en lugar de imprimir una línea por palabra
+    skipped_indices = []
+
+    # Enlazar a variables locales lo que se consulta en cada palabra
+    last_index = len(words_list) - 1
+    add_block = srt_blocks.append
+    format_time = format_ms_srt
+    split_lines = format_multi_line
 
     for i, word_data in enumerate(words_list):
         try:
@@ -91,23 +100,25 @@ def generate_srt_entries_from_words(words_list):
                  end_ms = int(end_ms_raw)
                  if start_ms >= end_ms or start_ms < 0: raise ValueError("Tiempo inválido")
             except (ValueError, TypeError):
-                 print(f"{Fore.YELLOW}Adv: Palabra omitida (índice {i}) - Tiempos inválidos.")
+                 skipped_indices.append(i)
                  continue
 
             # Inicio de un nuevo bloque
             if current_block_start_ms < 0:
                 current_block_start_ms = start_ms
                 current_block_words_text = [word_text]
+                current_block_chars = len(word_text)
                 last_word_end_ms = end_ms
                 continue
 
             # Calcular si hay pausa significativa
             pause_duration_ms = start_ms - last_word_end_ms if last_word_end_ms >= 0 else 0
 
-            # Texto y duración si añadiéramos esta palabra
-            potential_text = " ".join(current_block_words_text + [word_text])
+            # Longitud del texto y duración si añadiéramos esta palabra
+            # (se lleva la cuenta en vez de unir el bloque en cada palabra)
+            potential_chars = current_block_chars + 1 + len(word_text)
             potential_duration_sec = (end_ms - current_block_start_ms) / 1000.0
-            is_last_word = (i == len(words_list) - 1)
+            is_last_word = (i == last_index)
 
             # Condiciones para finalizar el bloque ANTES de añadir la palabra actual
             should_finalize_block = False
@@ -119,26 +130,28 @@ def generate_srt_entries_from_words(words_list):
                  final_text_current = " ".join(current_block_words_text)
             else:
                  if potential_duration_sec > max_duration_sec: should_finalize_block = True
-                 elif len(potential_text) > max_chars_per_block + 10: should_finalize_block = True
+                 elif potential_chars > max_chars_per_block + 10: should_finalize_block = True
                  elif pause_duration_ms > pause_threshold_ms and potential_duration_sec > min_duration_sec: should_finalize_block = True
 
             if should_finalize_block:
                 # Usar el texto acumulado ANTES de esta palabra (o incluyendo esta si es la última)
                 final_text_to_format = final_text_current if is_last_word else " ".join(current_block_words_text)
-                formatted_text_block = format_multi_line(final_text_to_format)
-                start_time_str = format_time_srt(current_block_start_ms / 1000.0)
+                # Solo dividir en 2 líneas cuando el texto no cabe en una
+                formatted_text_block = final_text_to_format if len(final_text_to_format) <= 40 else split_lines(final_text_to_format)
+                start_time_str = format_time(current_block_start_ms)
                 # Usar el tiempo final de la *última palabra del bloque*
-                end_time_str = format_time_srt(last_word_end_ms / 1000.0)
+                end_time_str = format_time(last_word_end_ms)
 
                 if formatted_text_block:
                     srt_entry = f"{entry_index}\n{start_time_str} --> {end_time_str}\n{formatted_text_block}"
-                    srt_blocks.append(srt_entry)
+                    add_block(srt_entry)
                     entry_index += 1
 
                 # Si NO es la última palabra, iniciar nuevo bloque con la palabra actual
                 if not is_last_word:
                      current_block_start_ms = start_ms
                      current_block_words_text = [word_text]
+                     current_block_chars = len(word_text)
                      last_word_end_ms = end_ms
                 else: # Si era la última, ya terminamos
                      current_block_words_text = []
@@ -146,6 +159,7 @@ def generate_srt_entries_from_words(words_list):
             else:
                 # Añadir palabra actual al bloque en curso
                 current_block_words_text.append(word_text)
+                current_block_chars = potential_chars
                 last_word_end_ms = end_ms
 
         except Exception as word_e:
@@ -160,21 +174,28 @@ def generate_srt_entries_from_words(words_list):
     # Pero lo dejamos por si acaso
     if current_block_words_text:
         final_text_last = " ".join(current_block_words_text)
-        formatted_text_last = format_multi_line(final_text_last)
-        start_time_str = format_time_srt(current_block_start_ms / 1000.0)
-        end_time_str = format_time_srt(last_word_end_ms / 1000.0)
+        formatted_text_last = final_text_last if len(final_text_last) <= 40 else format_multi_line(final_text_last)
+        start_time_str = format_ms_srt(current_block_start_ms)
+        end_time_str = format_ms_srt(last_word_end_ms)
         if formatted_text_last:
              srt_entry = f"{entry_index}\n{start_time_str} --> {end_time_str}\n{formatted_text_last}"
              srt_blocks.append(srt_entry)
 
+    if skipped_indices:
+        shown = ", ".join(str(idx) for idx in skipped_indices[:10])
+        more = f" (y {len(skipped_indices) - 10} más)" if len(skipped_indices) > 10 else ""
+        print(f"{Fore.YELLOW}Adv: {len(skipped_indices)} palabras omitidas por tiempos inválidos. Índices: {shown}{more}")
+
     print(f"{Fore.CYAN}Se generaron {len(srt_blocks)} bloques SRT finales.")
     return srt_blocks
 # --- FIN FUNCIÓN CLAVE ---
 
 def main():
     # --- CONFIGURACIÓN ---
-    # ¡¡ASEGÚRATE QUE ESTA RUTA ES CORRECTA!!
-    base_path = "/Users/rodrigo/NuevoPactoStudio/data/output" 
+    # Carpeta de salida del proyecto (relativa a la ubicación del script)
+    base_path = OUTPUT_DIR
+    # --force regenera el SRT aunque ya esté al día con el JSON
+    force = "--force" in sys.argv[1:]
     # --- FIN CONFIGURACIÓN ---
     
     if not os.path.isdir(base_path):
@@ -183,8 +204,9 @@ def main():
 
     # Listar sermones
     try:
-        sermon_dirs = [d for d in os.listdir(base_path) if os.path.isdir(os.path.join(base_path, d)) and d.startswith('sermon_')]
-        sermon_dirs.sort()
+        # scandir trae el tipo de cada entrada en la misma lectura del directorio
+        with os.scandir(base_path) as entries:
+            sermon_dirs = sorted(e.name for e in entries if e.name.startswith('sermon_') and e.is_dir())
     except Exception as e: print(f"{Fore.RED}Error listando sermones: {e}"); return
     if not sermon_dirs: print(f"{Fore.RED}No se encontraron directorios 'sermon_...' en '{base_path}'"); return
 
@@ -258,11 +280,11 @@ def main():
 
     print(f"\n{Fore.CYAN}Cargando JSON editado: {json_full_path}")
     try:
-        with open(json_full_path, 'r', encoding='utf-8') as f:
+        # Leer una sola vez y decodificar desde memoria
+        with open(json_full_path, 'rb') as f:
             raw_content = f.read()
-            if not raw_content.strip(): print(f"{Fore.RED}Error: JSON '{selected_json}' está vacío."); return
-            f.seek(0)
-            data = json.load(f)
+        if not raw_content.strip(): print(f"{Fore.RED}Error: JSON '{selected_json}' está vacío."); return
+        data = orjson.loads(raw_content) if orjson is not None else json.loads(raw_content)
     except json.JSONDecodeError as e: print(f"{Fore.RED}Error en formato JSON: {e}\n{Fore.YELLOW}Revisa '{selected_json}'."); return
     except FileNotFoundError: print(f"{Fore.RED}Error: No se encontró '{json_full_path}'."); return
     except Exception as e: print(f"{Fore.RED}Error leyendo JSON: {e}"); return
@@ -273,14 +295,6 @@ def main():
         print(f"{Fore.RED}Error: No se encontró la lista 'words' o está vacía/inválida en el JSON.")
         return
 
-    print(f"\n{Fore.CYAN}Generando SRT desde la lista 'words' editada...")
-    # Usar la función que agrupa palabras editadas en bloques SRT cortos y sincronizados
-    srt_content = generate_srt_entries_from_words(words_edited)
-    # --- FIN LÓGICA DE GENERACIÓN ACTUALIZADA ---
-
-    if not srt_content:
-        print(f"{Fore.RED}No se generó contenido SRT. Verifica la lista 'words' editada."); return
-
     # Nombre de archivo final
     video_name_base = os.path.splitext(selected_json)[0] # Base inicial
     if data.get('video_filename'): video_name_base = os.path.splitext(os.path.basename(data['video_filename']))[0]
@@ -290,9 +304,25 @@ def main():
     srt_name = f"{video_name_base}_subtitles_edit.srt" 
     srt_path = os.path.join(text_path, srt_name)
 
+    # Si el SRT es posterior a la última modificación del JSON, ya está al día
+    if not force and os.path.exists(srt_path) and os.path.getmtime(json_full_path) <= os.path.getmtime(srt_path):
+        print(f"\n{Fore.YELLOW}El JSON no cambió desde el último SRT. El SRT existente sigue vigente: {srt_path}")
+        print(f"{Fore.YELLOW}Usa --force para regenerarlo de todos modos.")
+        return
+
+    print(f"\n{Fore.CYAN}Generando SRT desde la lista 'words' editada...")
+    # Usar la función que agrupa palabras editadas en bloques SRT cortos y sincronizados
+    srt_content = generate_srt_entries_from_words(words_edited)
+    # --- FIN LÓGICA DE GENERACIÓN ACTUALIZADA ---
+
+    if not srt_content:
+        print(f"{Fore.RED}No se generó contenido SRT. Verifica la lista 'words' editada."); return
+
     try:
-        with open(srt_path, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(srt_content) + '\n\n')
+        # Escribir cada bloque directamente (sin unir todo en un solo string)
+        with open(srt_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            for srt_entry in srt_content:
+                f.write(f"{srt_entry}\n\n")
         print(f"\n{Fore.GREEN}{Style.BRIGHT}¡Éxito! Archivo SRT sincronizado y editado guardado como: {srt_path}{Style.RESET_ALL}")
     except Exception as e:
         print(f"{Fore.RED}Error al guardar SRT '{srt_path}': {e}")
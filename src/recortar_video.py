@@ -6,16 +6,19 @@ import sys
 import subprocess
 from datetime import datetime
 import time
-from colorama import init, Fore, Back, Style
 
-# Inicializar colorama
-init(autoreset=True)  # autoreset=True hace que cada impresión vuelva al color normal
+# Colores de consola (sin colorama cuando la salida no es una terminal)
+from console_colors import Fore, Style
+
+# Rutas del proyecto (se calculan una sola vez al importar)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(BASE_DIR, "source_video")
+INPUT_DIR = os.path.join(BASE_DIR, "data", "input")
 
 def main():
     # Configurar rutas
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    source_dir = os.path.join(base_dir, "source_video")
-    output_dir = os.path.join(base_dir, "data", "input")
+    source_dir = SOURCE_DIR
+    output_dir = INPUT_DIR
     
     # Verificar que existen las carpetas
     os.makedirs(source_dir, exist_ok=True)
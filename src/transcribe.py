@@ -3,20 +3,38 @@ Script principal para transcribir videos usando AssemblyAI.
 """
 import os
 import sys
-import glob
 import json
+import re
 import time
 from datetime import datetime
-from colorama import init, Fore, Back, Style
 
-# Inicializar colorama
-init(autoreset=True)  # autoreset=True hace que cada impresión vuelva al color normal
+# orjson es opcional: acelera la escritura de JSON grandes (miles de palabras)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Colores de consola (sin colorama cuando la salida no es una terminal)
+from console_colors import Fore, Style
+
+# Signos de puntuación que cierran un segmento de subtítulos
+STRONG_PUNCT = frozenset('.!?')
+WEAK_PUNCT = frozenset(',;:')
+# Finales de frase al agrupar palabras sin utterances (tupla para str.endswith)
+SENTENCE_ENDINGS = ('.', '!', '?', ':', ';')
+# Punto de corte justo después de cada signo de puntuación fuerte
+STRONG_PUNCT_SPLIT = re.compile(r'(?<=[.!?])')
+
+# Rutas del proyecto (se calculan una sola vez al importar)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUT_DIR = os.path.join(BASE_DIR, "data", "input")
+OUTPUT_DIR = os.path.join(BASE_DIR, "data", "output")
+ENV_PATH = os.path.join(BASE_DIR, ".env")  # Claves de API (ruta fija: sin buscar el .env por directorios)
 
 # Añadir la ruta del proyecto para importaciones
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
 
 from dotenv import load_dotenv
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 class AssemblyAITranscriber:
     """
@@ -44,10 +62,15 @@ class AssemblyAITranscriber:
         
     def _format_time_srt(self, seconds):
         """Convierte segundos a formato HH:MM:SS,mmm para SRT"""
-        hours, remainder = divmod(int(seconds), 3600)
-        minutes, seconds = divmod(remainder, 60)
-        milliseconds = int((seconds - int(seconds)) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
+        # Trabajar en milisegundos enteros para no perder la parte fraccionaria
+        return self._format_ms_srt(int(round(seconds * 1000)))
+
+    def _format_ms_srt(self, milliseconds):
+        """Convierte milisegundos enteros a formato HH:MM:SS,mmm para SRT"""
+        hours, remainder = divmod(milliseconds, 3600000)
+        minutes, remainder = divmod(remainder, 60000)
+        secs, millis = divmod(remainder, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
     def _generate_srt_entries(self, transcription_data):
         """
@@ -59,64 +82,69 @@ class AssemblyAITranscriber:
             print(f"{self.COLOR_INFO}Generando SRT usando marcas de tiempo a nivel de palabra para mayor precisión...")
             words = transcription_data['words']
             
-            # Crear segmentos a partir de palabras
-            segments = []
-            current_words = []
+            # Crear las entradas SRT directamente a partir de las palabras,
+            # sin materializar una lista intermedia de segmentos
+            srt_content = []
+            segment_start_index = None
             current_start = None
-            
+
             # Parámetros de segmentación
             max_words_per_segment = 8
             max_segment_duration = 3000  # 3 segundos en ms
-            
-            for i, word in enumerate(words):
+
+            # Extraer una sola vez cada campo en listas paralelas para no
+            # consultar los diccionarios de palabras dentro del bucle
+            texts = [w['text'] for w in words]
+            starts = [w['start'] for w in words]
+            ends = [w['end'] for w in words]
+            speakers = [w.get('speaker', 'A') for w in words]
+            last_chars = [t.rstrip()[-1:] for t in texts]
+            ends_with_strong_punct = [c in STRONG_PUNCT for c in last_chars]
+            ends_with_weak_punct = [c in WEAK_PUNCT for c in last_chars]
+            # Cierres que no dependen del segmento en curso (punto fuerte,
+            # cambio de hablante o última palabra): un solo indicador por palabra
+            speaker_changes = [a != b for a, b in zip(speakers, speakers[1:])]
+            speaker_changes.append(True)  # La última palabra siempre cierra
+            forced_close = [p or c for p, c in zip(ends_with_strong_punct, speaker_changes)]
+
+            # Enlazar a variables locales lo que se usa en cada iteración
+            # (LOAD_FAST en lugar de buscar atributos en cada vuelta)
+            format_ms_srt = self._format_ms_srt
+            format_multi_line = self._format_multi_line
+            add_entry = srt_content.append
+
+            for i in range(len(words)):
                 # Si es la primera palabra del segmento, marcar tiempo de inicio
-                if not current_words:
-                    current_start = word['start']
-                
-                current_words.append(word)
-                
+                if segment_start_index is None:
+                    segment_start_index = i
+                    current_start = starts[i]
+
                 # Verificar si debemos cerrar el segmento actual
-                ends_with_strong_punct = word['text'].rstrip().endswith(('.', '!', '?'))
-                ends_with_weak_punct = word['text'].rstrip().endswith((',', ';', ':'))
-                current_duration = word['end'] - current_start
-                
-                if (ends_with_strong_punct or
-                    (ends_with_weak_punct and len(current_words) >= 3) or
-                    len(current_words) >= max_words_per_segment or
-                    current_duration >= max_segment_duration or
-                    i == len(words) - 1):
-                    
-                    # Combinar las palabras en un texto
-                    text = ' '.join(w['text'] for w in current_words)
-                    
-                    # Añadir segmento
-                    segments.append({
-                        'index': len(segments) + 1,
-                        'start': current_start / 1000,  # Convertir a segundos
-                        'end': word['end'] / 1000,      # Convertir a segundos
-                        'text': text
-                    })
-                    
+                word_count = i - segment_start_index + 1
+                current_duration = ends[i] - current_start
+
+                if (forced_close[i] or
+                    (ends_with_weak_punct[i] and word_count >= 3) or
+                    word_count >= max_words_per_segment or
+                    current_duration >= max_segment_duration):
+
+                    # Combinar las palabras en un texto (máximo 2 líneas)
+                    text = ' '.join(texts[segment_start_index:i + 1])
+                    if len(text) > 40:
+                        text = format_multi_line(text)
+
+                    # Formatear tiempos directamente desde los milisegundos enteros
+                    # de AssemblyAI (sin pasar por segundos en coma flotante)
+                    start_formatted = format_ms_srt(current_start)
+                    end_formatted = format_ms_srt(ends[i])
+
+                    # Crear entrada SRT
+                    add_entry(f"{len(srt_content) + 1}\n{start_formatted} --> {end_formatted}\n{text}")
+
                     # Reiniciar para el siguiente segmento
-                    current_words = []
+                    segment_start_index = None
                     current_start = None
-            
-            # Generar entradas SRT a partir de los segmentos
-            srt_content = []
-            for segment in segments:
-                # Formatear tiempos
-                start_formatted = self._format_time_srt(segment['start'])
-                end_formatted = self._format_time_srt(segment['end'])
-                
-                # Formatear texto (máximo 2 líneas)
-                text = segment['text']
-                if len(text) > 40:
-                    text = self._format_multi_line(text)
-                
-                # Crear entrada SRT
-                srt_entry = f"{segment['index']}\n{start_formatted} --> {end_formatted}\n{text}"
-                srt_content.append(srt_entry)
-            
+
             return srt_content
         
         # Si no hay marcas de tiempo a nivel de palabra, usar segmentos
@@ -130,28 +158,25 @@ class AssemblyAITranscriber:
         if len(text) <= max_chars_per_line:
             return text
         
-        # Intentar dividir por puntos naturales cerca de la mitad
-        words = text.split()
         half_len = len(text) // 2
-        
-        # Buscar espacios cerca del punto medio
-        split_index = None
-        for i in range(half_len - 15, half_len + 15):
-            if i >= 0 and i < len(text) and text[i] == ' ':
-                split_index = i
-                break
-        
-        # Si no encontramos un buen punto de división, dividir entre palabras
-        if split_index is None:
-            current_len = 0
-            for i, word in enumerate(words):
-                current_len += len(word) + (1 if i > 0 else 0)
-                if current_len > half_len and i > 0:
-                    split_index = len(' '.join(words[:i]))
-                    break
-        
+
+        # Buscar el espacio más cercano al punto medio (rfind/find recorren
+        # el texto en C, sin bucle carácter por carácter)
+        left = text.rfind(' ', max(0, half_len - 15), half_len + 1)
+        right = text.find(' ', half_len, half_len + 15)
+        if left == -1:
+            split_index = right
+        elif right == -1:
+            split_index = left
+        else:
+            split_index = left if half_len - left <= right - half_len else right
+
+        # Si no hay espacio cerca de la mitad, usar el último que quepa en la línea
+        if split_index == -1:
+            split_index = text.rfind(' ', 0, max_chars_per_line + 1)
+
         # Si aún no hay punto de división, dividir exactamente por la mitad
-        if split_index is None or split_index <= 0:
+        if split_index <= 0:
             split_index = half_len
         
         # Crear las dos líneas
@@ -193,10 +218,6 @@ class AssemblyAITranscriber:
                 if not text:
                     continue
 
-                # Formatear tiempos
-                start_formatted = self._format_time_srt(start)
-                end_formatted = self._format_time_srt(end)
-
                 # Dividir texto en máximo 2 líneas
                 if len(text) > 40:
                     text = self._format_multi_line(text)
@@ -207,7 +228,10 @@ class AssemblyAITranscriber:
                 # Si la duración es muy larga, acortarla para mejor sincronización
                 if duration > 3.0:  # máximo 3 segundos
                     end = start + 3.0
-                    end_formatted = self._format_time_srt(end)
+                
+                # Formatear tiempos una sola vez, ya con el final ajustado
+                start_formatted = self._format_time_srt(start)
+                end_formatted = self._format_time_srt(end)
                 
                 # Crear entrada SRT con los tiempos ajustados
                 srt_entry = f"{i}\n{start_formatted} --> {end_formatted}\n{text}"
@@ -229,28 +253,21 @@ class AssemblyAITranscriber:
         base_name = os.path.splitext(video_filename)[0]
         output_prefix = f"sermon_{today}_"
         
-        # Buscar carpetas existentes con el mismo prefijo de fecha
-        existing_dirs = glob.glob(os.path.join(self.output_base_dir, f"{output_prefix}*"))
-        
-        # Determinar el número de contador
-        if not existing_dirs:
-            counter = 1
-        else:
-            # Extraer los números de contador existentes
-            counters = []
-            for dir_path in existing_dirs:
-                dir_name = os.path.basename(dir_path)
-                try:
-                    # Extraer el número del formato sermon_DDMMAA_XX
-                    counter_part = dir_name.replace(output_prefix, "")
-                    counters.append(int(counter_part))
-                except (ValueError, IndexError):
-                    continue
-            
-            if counters:
-                counter = max(counters) + 1
-            else:
-                counter = 1
+        # Buscar carpetas existentes con el mismo prefijo de fecha y quedarse
+        # con el mayor contador en una sola pasada (os.scandir no hace stat extra)
+        counter = 1
+        try:
+            with os.scandir(self.output_base_dir) as entries:
+                for entry in entries:
+                    if not entry.name.startswith(output_prefix):
+                        continue
+                    try:
+                        # Extraer el número del formato sermon_DDMMAA_XX
+                        counter = max(counter, int(entry.name[len(output_prefix):]) + 1)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
         
         # Crear la carpeta principal con el formato correcto
         main_output_dir = os.path.join(self.output_base_dir, f"{output_prefix}{counter:02d}")
@@ -362,6 +379,7 @@ class AssemblyAITranscriber:
             
             # Procesar la transcripción completada
             segments_list = []
+            words_list = None
             
             # Obtener segmentos (utterances)
             if transcript.utterances:
@@ -375,18 +393,9 @@ class AssemblyAITranscriber:
                     
                     # Si el segmento es muy largo (más de 6 segundos), dividirlo
                     if duration > 6 and len(text) > 80:
-                        # Dividir por puntuación fuerte
-                        sentences = []
-                        current = ""
-                        for char in text:
-                            current += char
-                            if char in ['.', '!', '?'] and len(current.strip()) > 0:
-                                sentences.append(current.strip())
-                                current = ""
-                        
-                        # Añadir la última parte si quedó algo
-                        if current.strip():
-                            sentences.append(current.strip())
+                        # Dividir por puntuación fuerte (la expresión regular recorre el
+                        # texto en C en lugar de concatenar carácter a carácter)
+                        sentences = [part for part in (piece.strip() for piece in STRONG_PUNCT_SPLIT.split(text)) if part]
                         
                         # Si se logró dividir, crear múltiples segmentos
                         if len(sentences) > 1:
@@ -426,16 +435,24 @@ class AssemblyAITranscriber:
                 # Agrupar palabras en frases (cuando hay puntuación)
                 current_sentence = []
                 current_start = None
+                last_word_index = len(transcript.words) - 1
+                
+                # En la misma pasada se guardan las palabras individuales,
+                # en lugar de recorrer transcript.words una segunda vez
+                words_list = []
                 
-                for word in transcript.words:
+                for word_index, word in enumerate(transcript.words):
+                    words_list.append(self._word_record(word))
+                    
                     if current_start is None:
                         current_start = float(word.start) / 1000
                     
                     current_sentence.append(word.text)
                     
                     # Si termina con puntuación o es la última palabra, crear un segmento
-                    if (word.text.endswith(('.', '!', '?', ':', ';')) or 
-                        word == transcript.words[-1]):
+                    # (por posición: comparar objetos palabra campo a campo es costoso)
+                    if (word.text.endswith(SENTENCE_ENDINGS) or 
+                        word_index == last_word_index):
                         
                         segments_list.append({
                             'start': current_start,
@@ -459,15 +476,8 @@ class AssemblyAITranscriber:
             
             # Guardar también las palabras individuales con marcas de tiempo para subtitulado preciso
             if transcript.words:
-                words_list = []
-                for word in transcript.words:
-                    words_list.append({
-                        'text': word.text,
-                        'start': word.start,
-                        'end': word.end,
-                        'confidence': word.confidence,
-                        'speaker': word.speaker if hasattr(word, 'speaker') else 'A'
-                    })
+                if words_list is None:
+                    words_list = [self._word_record(word) for word in transcript.words]
                 transcription_data['words'] = words_list
                 print(f"{self.COLOR_SUCCESS}Se guardaron {len(words_list)} palabras con marcas de tiempo precisas")
             
@@ -484,6 +494,97 @@ class AssemblyAITranscriber:
             error_message = f"Error durante la transcripción de {audio_path}: {str(e)}"
             raise Exception(error_message)
 
+    @staticmethod
+    def _word_record(word):
+        """
+        Convierte una palabra de AssemblyAI en un diccionario serializable.
+        """
+        return {
+            'text': word.text,
+            'start': word.start,
+            'end': word.end,
+            'confidence': word.confidence,
+            'speaker': word.speaker if hasattr(word, 'speaker') else 'A'
+        }
+
+    def _save_json(self, transcription_data, output_path):
+        """
+        Guarda la transcripción completa en formato JSON.
+        """
+        # orjson solo sabe sangrar con 2 espacios: con orjson el JSON sale con
+        # sangría de 2; sin él se mantiene la sangría de 4 de siempre
+        if orjson is not None:
+            with open(output_path, 'wb', buffering=1 << 20) as f:
+                f.write(orjson.dumps(transcription_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                json.dump(transcription_data, f, ensure_ascii=False, indent=4)
+        print(f"{self.COLOR_SUCCESS}Transcripción guardada en: {output_path}")
+
+    def _save_plain_text(self, transcription_data, video_filename, text_output_path):
+        """
+        Exporta la transcripción como texto plano.
+        """
+        # Cabecera del archivo de texto
+        header = []
+        header.append(f"TRANSCRIPCIÓN: {video_filename}")
+        header.append(f"Fecha de procesamiento: {transcription_data.get('processing_date') or datetime.now().isoformat()}")
+        header.append(f"Nivel de confianza: {transcription_data.get('confidence', 'N/A')}")
+        header.append("")  # Línea en blanco
+        header.append("=" * 80)  # Separador
+        header.append("")  # Línea en blanco
+
+        # Guardar la cabecera y después el texto principal, sin unir ambos
+        # en una copia intermedia de toda la transcripción
+        with open(text_output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write('\n'.join(header))
+            f.write('\n')
+            f.write(transcription_data.get('text', '').strip())
+        print(f"{self.COLOR_SUCCESS}Transcripción en texto plano guardada en: {text_output_path}")
+
+    def _save_detailed_text(self, transcription_data, video_filename, detailed_output_path):
+        """
+        Exporta la transcripción con marcas de tiempo y hablante por segmento.
+        """
+        # Se escribe línea a línea sobre el archivo con búfer en lugar de
+        # acumular todo el contenido en una lista y unirlo al final
+        with open(detailed_output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write(f"TRANSCRIPCIÓN DETALLADA: {video_filename}\n")
+            f.write(f"Fecha de procesamiento: {transcription_data.get('processing_date') or datetime.now().isoformat()}\n")
+            f.write("\n")  # Línea en blanco
+            f.write("=" * 80)  # Separador
+            f.write("\n\n")  # Línea en blanco
+
+            # Añadir segmentos con marcas de tiempo (HH:MM:SS con aritmética
+            # entera, sin crear un struct_time por segmento)
+            separator = ""
+            for segment in transcription_data.get('segments', []):
+                minutes, seconds = divmod(int(segment['start']), 60)
+                hours, minutes = divmod(minutes, 60)
+                speaker = segment.get('speaker', 'unknown')
+                f.write(f"{separator}[{hours:02d}:{minutes:02d}:{seconds:02d}] {speaker}: {segment['text']}")
+                separator = "\n"
+        print(f"{self.COLOR_SUCCESS}Transcripción detallada guardada en: {detailed_output_path}")
+
+    def _save_srt(self, transcription_data, srt_output_path):
+        """
+        Genera y guarda el archivo de subtítulos SRT.
+        """
+        # Generar entradas SRT usando el nuevo método
+        srt_content = self._generate_srt_entries(transcription_data)
+
+        # Guardar archivo SRT con verificación adicional
+        if srt_content:
+            # Escribir cada entrada directamente, sin unir todo en una sola cadena
+            with open(srt_output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                f.write(srt_content[0])
+                for entry in srt_content[1:]:
+                    f.write('\n\n')
+                    f.write(entry)
+            print(f"{self.COLOR_SUCCESS}Archivo de subtítulos SRT guardado en: {srt_output_path}")
+        else:
+            print(f"{self.COLOR_WARNING}No se generaron entradas SRT. El archivo quedará vacío.")
+
     def process_video(self, video_filename):
         """
         Procesa un video completo, desde la extracción de audio hasta la transcripción.
@@ -519,70 +620,17 @@ class AssemblyAITranscriber:
                 'processor': 'AssemblyAI'
             })
             
-            # Guardar la transcripción en formato JSON
+            # Guardar JSON, textos y SRT uno tras otro (los textos toman la
+            # fecha de 'processing_date', así todas las salidas coinciden)
+            base_name = os.path.splitext(video_filename)[0]
             try:
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(transcription_data, f, ensure_ascii=False, indent=4)
-                print(f"{self.COLOR_SUCCESS}Transcripción guardada en: {output_path}")
-                
-                # Exportar como texto plano
-                text_output_filename = os.path.splitext(video_filename)[0] + "_transcript.txt"
-                text_output_path = os.path.join(output_dirs["text"], text_output_filename)
-                
-                # Contenido para el archivo de texto
-                content = []
-                content.append(f"TRANSCRIPCIÓN: {video_filename}")
-                content.append(f"Fecha de procesamiento: {datetime.now().isoformat()}")
-                content.append(f"Nivel de confianza: {transcription_data.get('confidence', 'N/A')}")
-                content.append("")  # Línea en blanco
-                content.append("=" * 80)  # Separador
-                content.append("")  # Línea en blanco
-                
-                # Añadir el texto principal
-                content.append(transcription_data.get('text', '').strip())
-                
-                # Guardar el texto
-                with open(text_output_path, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(content))
-                print(f"{self.COLOR_SUCCESS}Transcripción en texto plano guardada en: {text_output_path}")
-                
-                # Versión formateada con marcas de tiempo
-                detailed_output_filename = os.path.splitext(video_filename)[0] + "_transcript_detailed.txt"
-                detailed_output_path = os.path.join(output_dirs["text"], detailed_output_filename)
-
-                # Contenido detallado
-                detailed_content = []
-                detailed_content.append(f"TRANSCRIPCIÓN DETALLADA: {video_filename}")
-                detailed_content.append(f"Fecha de procesamiento: {datetime.now().isoformat()}")
-                detailed_content.append("")  # Línea en blanco
-                detailed_content.append("=" * 80)  # Separador
-                detailed_content.append("")  # Línea en blanco
-
-                # Añadir segmentos con marcas de tiempo
-                for segment in transcription_data.get('segments', []):
-                    start_time = time.strftime('%H:%M:%S', time.gmtime(segment['start']))
-                    speaker = segment.get('speaker', 'unknown')
-                    detailed_content.append(f"[{start_time}] {speaker}: {segment['text']}")
-
-                # Guardar el texto detallado
-                with open(detailed_output_path, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(detailed_content))
-                print(f"{self.COLOR_SUCCESS}Transcripción detallada guardada en: {detailed_output_path}")
-
-                # Guardar también como archivo SRT para subtítulos
-                srt_output_filename = os.path.splitext(video_filename)[0] + "_subtitles.srt"
-                srt_output_path = os.path.join(output_dirs["text"], srt_output_filename)
-
-                # Generar entradas SRT usando el nuevo método
-                srt_content = self._generate_srt_entries(transcription_data)
-
-                # Guardar archivo SRT con verificación adicional
-                if srt_content:
-                    with open(srt_output_path, 'w', encoding='utf-8') as f:
-                        f.write('\n\n'.join(srt_content))
-                    print(f"{self.COLOR_SUCCESS}Archivo de subtítulos SRT guardado en: {srt_output_path}")
-                else:
-                    print(f"{self.COLOR_WARNING}No se generaron entradas SRT. El archivo quedará vacío.")
+                self._save_json(transcription_data, output_path)
+                self._save_plain_text(transcription_data, video_filename,
+                                      os.path.join(output_dirs["text"], base_name + "_transcript.txt"))
+                self._save_detailed_text(transcription_data, video_filename,
+                                         os.path.join(output_dirs["text"], base_name + "_transcript_detailed.txt"))
+                self._save_srt(transcription_data,
+                               os.path.join(output_dirs["text"], base_name + "_subtitles.srt"))
 
             except Exception as e:
                 print(f"{self.COLOR_ERROR}Error al guardar archivos de salida: {e}")
@@ -603,7 +651,7 @@ def main():
     print()
     
     # Cargar variables de entorno
-    load_dotenv()
+    load_dotenv(ENV_PATH)
 
     # Verificar API key
     api_key = os.getenv("ASSEMBLYAI_API_KEY")
@@ -614,8 +662,8 @@ def main():
         sys.exit(1)
 
     # Configurar rutas
-    input_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "input")
-    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "output")
+    input_dir = INPUT_DIR
+    output_dir = OUTPUT_DIR
 
     # Verificar que existen las carpetas
     os.makedirs(input_dir, exist_ok=True)